@@ -0,0 +1,191 @@
+import datetime as dt
+import logging
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import torch
+
+from signals import macd
+from simulation import simulate, whole_dataset
+from window_dataset import WindowStockDataset
+
+logger = logging.getLogger(__name__)
+
+
+class BacktestResult(NamedTuple):
+    returns: np.ndarray  # strategy return of every bar
+    equity: np.ndarray  # compounded equity, starts from 1
+    pnl: np.ndarray  # PnL for a position of one share, after costs
+    total_return: np.ndarray
+    hit_rate: np.ndarray
+    max_drawdown: np.ndarray
+    turnover: np.ndarray  # mean absolute position change per bar
+
+
+class WalkForwardResult(NamedTuple):
+    index: pd.Index  # bars with a prediction
+    predictions: np.ndarray
+    result: BacktestResult
+
+
+def predict(net, dataset, num_steps, device=None) -> np.ndarray:
+    """
+    Predicted direction (1 up, 0 down) for every sample of dataset,
+    simulated as one batch.
+    """
+    data, _ = whole_dataset(dataset)
+    if device is not None:
+        data = data.to(device)
+    with torch.no_grad():
+        net.eval()
+        spk_count = simulate(net, data, num_steps).spk_count
+    return spk_count.argmax(dim=1).cpu().numpy()
+
+
+def predict_many(nets, dataset, num_steps, device=None) -> np.ndarray:
+    """:return: predictions of shape (len(nets), len(dataset))"""
+    return np.stack([predict(net, dataset, num_steps, device) for net in nets])
+
+
+def positions_from_predictions(predictions, allow_short=True) -> np.ndarray:
+    predictions = np.asarray(predictions)
+    return np.where(predictions == 1, 1.0, -1.0 if allow_short else 0.0)
+
+
+def backtest(close, predictions, cost=0.0, allow_short=True) -> BacktestResult:
+    """
+    Vectorized backtest of direction predictions: for bar i the position
+    is opened at close[..., i] and closed at close[..., i + 1].
+    Leading dimensions broadcast, so many models and/or tickers
+    are evaluated at once.
+    :param close: close prices of shape (..., n + 1)
+    :param predictions: 1 (up) / 0 (down) of shape (..., n)
+    :param cost: cost of a unit position change as a fraction of price
+    :param allow_short: short on 0, otherwise stay out of the market
+    :return: BacktestResult, metrics have the leading shape
+    """
+    close = np.asarray(close, dtype=np.float64)
+    positions = positions_from_predictions(predictions, allow_short)
+    if close.shape[-1] != positions.shape[-1] + 1:
+        raise ValueError(
+            'close must have one more bar than predictions',
+            close.shape,
+            positions.shape,
+        )
+    price_change = np.diff(close, axis=-1)
+    market_returns = price_change / close[..., :-1]
+    trades = np.abs(np.diff(positions, axis=-1, prepend=0.0))
+
+    returns = positions * market_returns - cost * trades
+    equity = np.cumprod(1 + returns, axis=-1)
+    drawdown = 1 - equity / np.maximum.accumulate(equity, axis=-1)
+    pnl = (positions * price_change - cost * trades * close[..., :-1]).sum(
+        axis=-1
+    )
+    moved = (positions != 0) & (price_change != 0)
+    hits = moved & (np.sign(positions) == np.sign(price_change))
+    hit_rate = hits.sum(axis=-1) / np.maximum(moved.sum(axis=-1), 1)
+
+    return BacktestResult(
+        returns=returns,
+        equity=equity,
+        pnl=pnl,
+        total_return=equity[..., -1] - 1,
+        hit_rate=hit_rate,
+        max_drawdown=drawdown.max(axis=-1),
+        turnover=trades.mean(axis=-1),
+    )
+
+
+def macd_hist_features(data: pd.DataFrame) -> pd.DataFrame:
+    macd_line, macd_signal = macd(data.close)
+    return (macd_line - macd_signal).to_frame('macd_hist')
+
+
+def walk_forward_splits(
+    length: int, train_size: int, test_size: int, step: Optional[int] = None
+) -> list[tuple[slice, slice]]:
+    """Row ranges (train, test) of consecutive walk-forward windows."""
+    step = step or test_size
+    splits = []
+    start = 0
+    while start + train_size + test_size <= length:
+        test_start = start + train_size
+        splits.append(
+            (
+                slice(start, test_start),
+                slice(test_start, test_start + test_size),
+            )
+        )
+        start += step
+    return splits
+
+
+def walk_forward(
+    dataloader,
+    ticker: str,
+    start: dt.datetime,
+    end: dt.datetime,
+    train_fn: Callable[[WindowStockDataset], torch.nn.Module],
+    train_size: int = 250,
+    test_size: int = 60,
+    window: int = 10,
+    num_steps: int = 50,
+    interval: str = '1d',
+    features: Callable[[pd.DataFrame], pd.DataFrame] = macd_hist_features,
+    cost: float = 0.0,
+    device=None,
+) -> WalkForwardResult:
+    """
+    Retrain a model on every walk-forward window and backtest
+    the out-of-sample predictions of all windows together.
+    Data is loaded once with DataLoader.get_data_less_day and features
+    are computed once over the whole period (they only use past bars).
+    :param dataloader: dataloader.DataLoader
+    :param train_fn: train_fn(train_dataset) -> trained net
+    :param train_size: train bars in every window
+    :param test_size: test bars in every window (also the step)
+    :param features: features(data) -> DataFrame aligned with data
+    """
+    data = dataloader.get_data_less_day(ticker, start, end, interval=interval)
+    feature_data = features(data)
+    close = data.close.values
+
+    predictions = []
+    splits = walk_forward_splits(len(data), train_size, test_size)
+    if not splits:
+        raise ValueError(
+            f'Not enough data for walk-forward: {len(data)} bars',
+            train_size,
+            test_size,
+        )
+    for train_rows, test_rows in splits:
+        logger.info(
+            'Walk-forward %s: train %s - %s, test %s - %s',
+            ticker,
+            data.index[train_rows.start],
+            data.index[train_rows.stop - 1],
+            data.index[test_rows.start],
+            data.index[test_rows.stop - 1],
+        )
+        net = train_fn(
+            WindowStockDataset(
+                feature_data.iloc[train_rows], close[train_rows], window
+            )
+        )
+        # window bars before the test range, so the first prediction
+        # is for the first test bar
+        rows = slice(test_rows.start - window, test_rows.stop)
+        test_dataset = WindowStockDataset(
+            feature_data.iloc[rows], close[rows], window
+        )
+        predictions.append(predict(net, test_dataset, num_steps, device))
+
+    first, last = splits[0][1].start, splits[-1][1].stop
+    predictions_all = np.concatenate(predictions)
+    return WalkForwardResult(
+        index=data.index[first:last],
+        predictions=predictions_all,
+        result=backtest(close[first - 1 : last], predictions_all, cost=cost),
+    )
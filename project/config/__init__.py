@@ -1,33 +1,46 @@
-import datetime as dt
 import logging
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Union
 
-from pydantic import BaseSettings, Field
-from pytz import timezone
+if TYPE_CHECKING:
+    from .settings import ConfigData
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+logging_format = '%(filename)s %(funcName)s [LINE:%(lineno)d]# %(levelname)-8s [%(asctime)s] %(name)s: %(message)s'
 
-class ConfigData(BaseSettings):
-    TOKEN_RO_ROBOOTEST: str = Field(None, env='TINKOFF_RO_TOKEN')
-    ROBOTEST_ACC_ID: str = Field(None, env='TINKOFF_RO_ACC_ID')
-    tzinfo = dt.datetime.now(tz=timezone('Europe/Moscow')).tzinfo
-    logs_dir: Path = Field(BASE_DIR / 'logs', env='logs_dir')
-    cache_dir: Path = Field(BASE_DIR / 'cache', env='cache_dir')
 
-    class Config:
-        env_file: Path = BASE_DIR / '.env'
+@lru_cache(maxsize=None)
+def get_config() -> 'ConfigData':
+    """
+    Settings from the environment and .env, read on the first call.
+    pydantic is imported and logs_dir, cache_dir are created only here,
+    so importing config has no side effects.
+    """
+    from .settings import ConfigData
 
+    cfg = ConfigData()
+    cfg.logs_dir.mkdir(exist_ok=True)
+    cfg.cache_dir.mkdir(exist_ok=True)
+    return cfg
 
-cfg = ConfigData()
-cfg.logs_dir.mkdir(exist_ok=True)
-cfg.cache_dir.mkdir(exist_ok=True)
 
+def setup_logging(filename: Union[str, Path] = 'logs.log') -> None:
+    """Log to filename, call it from the application, not on import."""
+    logging.basicConfig(
+        format=logging_format,
+        level=logging.INFO,
+        filename=filename,
+    )
 
-logging_format = '%(filename)s %(funcName)s [LINE:%(lineno)d]# %(levelname)-8s [%(asctime)s] %(name)s: %(message)s'
 
-logging.basicConfig(
-    format=logging_format,
-    level=logging.INFO,
-    filename='logs.log',
-)
+def __getattr__(name: str) -> Any:
+    # `from config import cfg` still works, settings are built on access
+    if name == 'cfg':
+        return get_config()
+    if name == 'ConfigData':
+        from .settings import ConfigData
+
+        return ConfigData
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
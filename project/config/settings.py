@@ -0,0 +1,18 @@
+import datetime as dt
+from pathlib import Path
+
+from pydantic import BaseSettings, Field
+from pytz import timezone
+
+from . import BASE_DIR
+
+
+class ConfigData(BaseSettings):
+    TOKEN_RO_ROBOOTEST: str = Field(None, env='TINKOFF_RO_TOKEN')
+    ROBOTEST_ACC_ID: str = Field(None, env='TINKOFF_RO_ACC_ID')
+    tzinfo = dt.datetime.now(tz=timezone('Europe/Moscow')).tzinfo
+    logs_dir: Path = Field(BASE_DIR / 'logs', env='logs_dir')
+    cache_dir: Path = Field(BASE_DIR / 'cache', env='cache_dir')
+
+    class Config:
+        env_file: Path = BASE_DIR / '.env'
@@ -1,26 +1,27 @@
 import datetime as dt
 import logging
 from itertools import count
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 import pandas as pd
-import yfinance
-from tinkoff.invest import HistoricCandle, Quotation
 # from tqdm.autonotebook import tqdm
 from m3tqdm import tqdm
 
-from config import cfg
-from m3_tinkoff_client.client import TinkoffClientByM3
+from config import get_config
+
+if TYPE_CHECKING:
+    from tinkoff.invest import HistoricCandle, Quotation
+
+    from m3_tinkoff_client.client import TinkoffClientByM3
 
 logger = logging.getLogger(__name__)
-logger.addHandler(logging.StreamHandler())
 
 
 class DataLoader:
     def __init__(
         self,
         datareader: str = 'tinkoff',
-        client: Optional[TinkoffClientByM3] = None,
+        client: Optional['TinkoffClientByM3'] = None,
     ) -> None:
         self._all_datareaders = {
             'yahoo': self._get_data_yahoo,
@@ -50,8 +51,11 @@ class DataLoader:
         self.datareader = datareader
         if datareader == 'tinkoff' and client is None:
             if client is None:
+                # tinkoff.invest SDK is imported only for this datareader
+                from m3_tinkoff_client.client import TinkoffClientByM3
+
                 client = TinkoffClientByM3(
-                    cfg.TOKEN_RO_ROBOOTEST, is_real=False
+                    get_config().TOKEN_RO_ROBOOTEST, is_real=False
                 )
 
         self.client = client
@@ -68,10 +72,10 @@ class DataLoader:
         logger.info('DataLoader %s created', self.datareader)
 
     @staticmethod
-    def _quotation_to_float(quo: Quotation) -> float:
+    def _quotation_to_float(quo: 'Quotation') -> float:
         return float(f'{quo.units}.{quo.nano}')
 
-    def _candle_to_dict(self, elem: HistoricCandle) -> dict[str, Any]:
+    def _candle_to_dict(self, elem: 'HistoricCandle') -> dict[str, Any]:
         return {
             'time': elem.time,
             'open': self._quotation_to_float(elem.open),
@@ -121,6 +125,8 @@ class DataLoader:
     ) -> Optional[pd.DataFrame]:
         if interval.endswith('min'):
             interval = interval.replace('min', 'm')
+        import yfinance
+
         return yfinance.download(
             ticker, start=start, end=end, interval=interval, progress=False
         )
@@ -0,0 +1,236 @@
+import logging
+from typing import Any, Optional
+
+import torch
+import torch.nn as nn
+from snntorch import surrogate
+
+from models import NetFF
+from simulation import leaky_recurrence, whole_dataset
+
+logger = logging.getLogger(__name__)
+
+SHARED_PARAMETERS = (
+    'model_name',
+    'num_hidden',
+    'learn_threshold',
+    'reset_mechanism',
+    'spike_grad_rate',
+    'num_steps',
+)
+
+
+class EnsembleNetFF(nn.Module):
+    """
+    N NetFF of the same shape as one model: weights are stacked along
+    the first dimension and every layer is one batched matmul.
+    Members may differ in initial weights, beta and threshold.
+    Members do not interact, so summing their losses and taking one
+    Adam step trains each of them as if it was trained alone.
+    """
+
+    def __init__(
+        self,
+        nets: list[NetFF],
+        reset_mechanism: str = 'subtract',
+        spike_grad=None,
+    ) -> None:
+        super().__init__()
+        self.reset_mechanism = reset_mechanism
+        self.spike_grad = spike_grad or surrogate.fast_sigmoid(slope=25)
+
+        def stack(get):
+            return nn.Parameter(
+                torch.stack([get(net).detach().clone() for net in nets])
+            )
+
+        self.w1 = stack(lambda net: net.lin1.weight.t())
+        self.b1 = stack(lambda net: net.lin1.bias.unsqueeze(0))
+        self.w2 = stack(lambda net: net.lin2.weight.t())
+        self.b2 = stack(lambda net: net.lin2.bias.unsqueeze(0))
+
+        for name in ('beta', 'threshold'):
+            for layer in ('lif1', 'lif2'):
+                values = torch.stack(
+                    [
+                        getattr(getattr(net, layer), name)
+                        .detach()
+                        .clone()
+                        .float()
+                        .reshape(1, 1)
+                        for net in nets
+                    ]
+                )
+                if name == 'threshold' and isinstance(
+                    nets[0].lif1.threshold, nn.Parameter
+                ):
+                    self.register_parameter(
+                        f'{layer}_{name}', nn.Parameter(values)
+                    )
+                else:
+                    self.register_buffer(f'{layer}_{name}', values)
+
+    @property
+    def num_members(self) -> int:
+        return self.w1.size(0)
+
+    def simulate(self, data, num_steps) -> torch.Tensor:
+        """
+        :param data: input batch shared by all members
+        :return: output spikes of shape (num_steps, members, batch, outputs)
+        """
+        x = data.flatten(1).expand(self.num_members, -1, -1)
+        cur1 = torch.baddbmm(self.b1, x, self.w1)
+        spk1, _ = leaky_recurrence(
+            cur1.expand(num_steps, *cur1.shape),
+            self.lif1_beta,
+            self.lif1_threshold,
+            self.reset_mechanism,
+            self.spike_grad,
+        )
+        # (T, N, B, H) -> (N, T * B, H) for one bmm per layer
+        members, batch = cur1.size(0), cur1.size(1)
+        spk1 = spk1.transpose(0, 1).reshape(members, num_steps * batch, -1)
+        cur2 = torch.baddbmm(self.b2, spk1, self.w2)
+        cur2 = cur2.reshape(members, num_steps, batch, -1).transpose(0, 1)
+        spk_rec, _ = leaky_recurrence(
+            cur2,
+            self.lif2_beta,
+            self.lif2_threshold,
+            self.reset_mechanism,
+            self.spike_grad,
+        )
+        return spk_rec
+
+    def member(self, idx: int) -> NetFF:
+        """Member idx as a standalone NetFF."""
+        net = NetFF(
+            self.w1.size(1),
+            num_hidden=self.w1.size(2),
+            num_outputs=self.w2.size(2),
+            beta=self.lif1_beta[idx].item(),
+            threshold=self.lif1_threshold[idx].item(),
+            learn_threshold=isinstance(self.lif1_threshold, nn.Parameter),
+            reset_mechanism=self.reset_mechanism,
+            spike_grad=self.spike_grad,
+        )
+        with torch.no_grad():
+            net.lin1.weight.copy_(self.w1[idx].t())
+            net.lin1.bias.copy_(self.b1[idx, 0])
+            net.lin2.weight.copy_(self.w2[idx].t())
+            net.lin2.bias.copy_(self.b2[idx, 0])
+            net.lif2.threshold.copy_(self.lif2_threshold[idx].squeeze())
+        return net.to(self.w1.device)
+
+
+def ensemble_from_configs(
+    configs: list[dict[str, Any]],
+    num_inputs: int,
+    seeds: Optional[list[int]] = None,
+) -> EnsembleNetFF:
+    """
+    One EnsembleNetFF from sweep configs (see sweep.make_grid)
+    that differ only in beta, threshold and seed.
+    """
+    shared = {
+        tuple(config.get(key) for key in SHARED_PARAMETERS)
+        for config in configs
+    }
+    if len(shared) != 1 or configs[0]['model_name'] != 'NetFF':
+        raise ValueError(
+            'Ensemble needs NetFF configs with the same',
+            *SHARED_PARAMETERS,
+        )
+    seeds = seeds or [0] * len(configs)
+    spike_grad = surrogate.fast_sigmoid(configs[0]['spike_grad_rate'])
+    nets = []
+    for config, seed in zip(configs, seeds):
+        torch.manual_seed(seed)
+        nets.append(
+            NetFF(
+                num_inputs,
+                num_hidden=config['num_hidden'],
+                beta=config['beta'],
+                threshold=config['threshold'],
+                learn_threshold=config['learn_threshold'],
+                reset_mechanism=config['reset_mechanism'],
+                spike_grad=spike_grad,
+            )
+        )
+    return EnsembleNetFF(
+        nets,
+        reset_mechanism=configs[0]['reset_mechanism'],
+        spike_grad=spike_grad,
+    )
+
+
+def _member_losses(spk_rec, targets) -> torch.Tensor:
+    # ce_rate_loss of every member: mean over time steps and batch
+    log_p_y = spk_rec.log_softmax(dim=-1)
+    index = targets.view(1, 1, -1, 1).expand(*log_p_y.shape[:-1], 1)
+    return -log_p_y.gather(-1, index).squeeze(-1).mean(dim=(0, 2))
+
+
+def ensemble_accuracy(ensemble, loader, num_steps, device=None) -> list[float]:
+    """Accuracy of every member on the whole dataset of loader."""
+    data, targets = whole_dataset(loader)
+    if device is not None:
+        data = data.to(device)
+        targets = targets.to(device)
+    with torch.no_grad():
+        ensemble.eval()
+        spk_count = ensemble.simulate(data, num_steps).sum(dim=0)
+    return (spk_count.argmax(dim=-1) == targets).float().mean(dim=1).tolist()
+
+
+def fit_ensemble(
+    ensemble: EnsembleNetFF,
+    train_loader,
+    test_loader,
+    num_steps: int = 50,
+    num_epochs: int = 25,
+    lr: float = 1e-2,
+    device=None,
+) -> tuple[list[list[float]], list[list[float]], list[list[float]]]:
+    """
+    Train all members with one Adam step per batch.
+    :return: train_acc_hist, test_acc_hist, loss_hist,
+        every item is a list with a value per member
+    """
+    optimizer = torch.optim.Adam(
+        ensemble.parameters(), lr=lr, betas=(0.9, 0.999)
+    )
+    train_acc_hist: list[list[float]] = []
+    test_acc_hist: list[list[float]] = []
+    loss_hist: list[list[float]] = []
+
+    for epoch in range(num_epochs):
+        ensemble.train()
+        total_loss = torch.zeros(ensemble.num_members)
+        batches = 0
+        for data, targets in train_loader:
+            if device is not None:
+                data = data.to(device)
+                targets = targets.to(device)
+            losses = _member_losses(
+                ensemble.simulate(data, num_steps), targets
+            )
+            optimizer.zero_grad()
+            losses.sum().backward()
+            optimizer.step()
+            total_loss += losses.detach().cpu()
+            batches += 1
+        loss_hist.append((total_loss / max(batches, 1)).tolist())
+        train_acc_hist.append(
+            ensemble_accuracy(ensemble, train_loader, num_steps, device)
+        )
+        test_acc_hist.append(
+            ensemble_accuracy(ensemble, test_loader, num_steps, device)
+        )
+        logger.info(
+            'Epoch %s, best member test acc %s',
+            epoch + 1,
+            max(test_acc_hist[-1]),
+        )
+
+    return train_acc_hist, test_acc_hist, loss_hist
@@ -0,0 +1,102 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+PROJECT_DIR = Path(__file__).resolve().parent
+MODULES = ('config', 'm3_tinkoff_client.cache', 'dataloader')
+
+
+def _run(code: str, cwd: Path, project_dir: Path) -> float:
+    env = dict(os.environ, PYTHONPATH=str(project_dir))
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=cwd,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return time.perf_counter() - start
+
+
+def import_time(
+    module: str, repeat: int = 10, project_dir: Path = PROJECT_DIR
+) -> dict[str, Any]:
+    """
+    Startup of a fresh interpreter that imports module, as paid
+    by every spawned worker, minus startup of a bare interpreter.
+    Runs in an empty directory, so files created on import show up.
+    :param project_dir: project to import from (used as PYTHONPATH)
+    :return: median import time in milliseconds and created files,
+        or the import error
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd = Path(tmp_dir)
+        try:
+            bare = [_run('pass', cwd, project_dir) for _ in range(repeat)]
+            imported = [
+                _run(f'import {module}', cwd, project_dir)
+                for _ in range(repeat)
+            ]
+        except subprocess.CalledProcessError as exc:
+            return {'error': exc.stderr.strip().splitlines()[-1]}
+        created = sorted(path.name for path in cwd.iterdir())
+    return {
+        'import_ms': 1e3
+        * (statistics.median(imported) - statistics.median(bare)),
+        'created_files': created,
+    }
+
+
+def export_revision(revision: str, out_dir: Path) -> Path:
+    """
+    Project directory of a git revision, exported to out_dir.
+    :return: exported project directory
+    """
+
+    def git(*args: str) -> bytes:
+        return subprocess.run(
+            ['git', *args], cwd=PROJECT_DIR, check=True, capture_output=True
+        ).stdout
+
+    top_level = git('rev-parse', '--show-toplevel').decode().strip()
+    prefix = git('rev-parse', '--show-prefix').decode().strip()
+    # tree-ish archives must be made from the top level of the repo
+    archive = git('-C', top_level, 'archive', f'{revision}:{prefix}')
+    subprocess.run(['tar', '-x', '-C', out_dir], input=archive, check=True)
+    return out_dir
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Import time of project modules in a fresh interpreter.'
+    )
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument(
+        '--baseline',
+        help='project directory of another checkout or a git revision '
+        'to measure the same imports against',
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as export_dir:
+        baseline_dir = None
+        if args.baseline is not None:
+            baseline_dir = Path(args.baseline)
+            if not baseline_dir.is_dir():
+                baseline_dir = export_revision(args.baseline, Path(export_dir))
+        for module in args.modules:
+            print(module, import_time(module, args.repeat))
+            if baseline_dir is not None:
+                print(
+                    f'{module} (baseline)',
+                    import_time(module, args.repeat, baseline_dir),
+                )
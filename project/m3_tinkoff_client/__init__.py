@@ -1,10 +1,13 @@
 import logging
 
-from config import cfg
+from config import get_config
 
-logging.basicConfig(
-    format='%(filename)s %(funcName)s [LINE:%(lineno)d]# %(levelname)-8s '
-    '[%(asctime)s] %(name)s: %(message)s',
-    level=logging.INFO,
-    filename=cfg.logs_dir / 'm3_tinkoff_client.log',
-)
+
+def setup_logging() -> None:
+    """Log to logs_dir / m3_tinkoff_client.log, not done on import."""
+    logging.basicConfig(
+        format='%(filename)s %(funcName)s [LINE:%(lineno)d]# %(levelname)-8s '
+        '[%(asctime)s] %(name)s: %(message)s',
+        level=logging.INFO,
+        filename=get_config().logs_dir / 'm3_tinkoff_client.log',
+    )
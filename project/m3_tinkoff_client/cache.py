@@ -1,7 +1,8 @@
 import logging
+from functools import lru_cache
 from typing import Any
 
-from config import cfg
+from config import get_config
 
 from .candles_cache import CandlesCache
 from .data_cache import DataCache
@@ -13,5 +14,17 @@ CACHE: dict[str, Any] = {
     'BY_FIGI': DataCache(),  # FIGI - INSTRUMENT
     'PRICE': {},
 }
-CANDLES_CACHE = CandlesCache(cfg.cache_dir)
-logger.info('CACHE loaded')
+
+
+@lru_cache(maxsize=None)
+def get_candles_cache() -> CandlesCache:
+    """CandlesCache of cfg.cache_dir, the directory is scanned on first use."""
+    candles_cache = CandlesCache(get_config().cache_dir)
+    logger.info('CACHE loaded')
+    return candles_cache
+
+
+def __getattr__(name: str) -> Any:
+    if name == 'CANDLES_CACHE':
+        return get_candles_cache()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
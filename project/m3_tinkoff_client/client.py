@@ -14,7 +14,7 @@ from tinkoff.invest import (
 )
 from tinkoff.invest.exceptions import StatusCode
 
-from .cache import CACHE, CANDLES_CACHE
+from .cache import CACHE, get_candles_cache
 
 
 class TinkoffClientByM3:
@@ -217,7 +217,8 @@ class TinkoffClientByM3:
             figi = self.get_figi_by_ticker(ticker, repeat=repeat)
         else:
             ticker = self.get_ticker_by_figi(figi, repeat=repeat)
-        cached = CANDLES_CACHE.get(
+        candles_cache = get_candles_cache()
+        cached = candles_cache.get(
             ticker=ticker, interval=interval, start=from_date, end=to_date
         )
         if cached is not None:
@@ -235,7 +236,7 @@ class TinkoffClientByM3:
             to=to_date,
             interval=candle_interval,
         )
-        CANDLES_CACHE.push(
+        candles_cache.push(
             data,
             ticker=ticker,
             interval=interval,
@@ -0,0 +1,100 @@
+import snntorch as snn
+import torch
+import torch.nn as nn
+from snntorch import surrogate
+
+device = (
+    torch.device('cuda') if torch.cuda.is_available() else torch.device('cpu')
+)
+
+
+class NetFF(nn.Module):
+    def __init__(
+        self,
+        num_inputs,
+        num_hidden=8,
+        num_outputs=2,
+        beta=0.5,
+        threshold=1,
+        learn_threshold=False,
+        reset_mechanism='subtract',
+        spike_grad=None,
+    ):
+        super().__init__()
+
+        spike_grad = spike_grad or surrogate.fast_sigmoid(slope=25)
+
+        self.lin1 = nn.Linear(num_inputs, num_hidden)
+        self.lif1 = snn.Leaky(
+            beta=beta,
+            spike_grad=spike_grad,
+            threshold=threshold,
+            init_hidden=True,
+            learn_threshold=learn_threshold,
+            reset_mechanism=reset_mechanism,
+        )
+        self.lin2 = nn.Linear(num_hidden, num_outputs)
+        self.lif2 = snn.Leaky(
+            beta=beta,
+            spike_grad=spike_grad,
+            threshold=threshold,
+            init_hidden=True,
+            learn_threshold=learn_threshold,
+            reset_mechanism=reset_mechanism,
+            output=True,
+        )
+
+    def forward(self, x):
+        return self.lif2(self.lin2(self.lif1(self.lin1(x.flatten(1)))))
+
+
+class NetLSTM(nn.Module):
+    def __init__(
+        self,
+        num_inputs,
+        num_hidden=8,
+        num_outputs=2,
+        threshold=0.5,
+        learn_threshold=False,
+        reset_mechanism='subtract',
+        spike_grad=None,
+        beta=None,
+    ):
+        super().__init__()
+
+        spike_grad = spike_grad or surrogate.fast_sigmoid(25)
+
+        self.slstm1 = snn.SLSTM(
+            num_inputs,
+            num_hidden,
+            spike_grad=spike_grad,
+            threshold=threshold,
+            learn_threshold=learn_threshold,
+            reset_mechanism=reset_mechanism,
+        )
+        self.slstm2 = snn.SLSTM(
+            num_hidden,
+            num_outputs,
+            spike_grad=spike_grad,
+            threshold=threshold,
+            learn_threshold=learn_threshold,
+            output=True,
+            reset_mechanism=reset_mechanism,
+        )
+
+    def forward(self, x):
+        mem, syn = self.slstm1.init_slstm()
+        out, mem, syn = self.slstm1(x.flatten(1), syn=syn, mem=mem)
+
+        mem, syn = self.slstm2.init_slstm()
+        out, mem, syn = self.slstm2(out, syn=syn, mem=mem)
+        return out, mem, syn
+
+
+def model_getter(model_type='NetFF', **kwargs):
+    if model_type == 'NetFF':
+        return NetFF(**kwargs).to(device)
+    elif model_type == 'NetLSTM':
+        return NetLSTM(**kwargs).to(device)
+    else:
+        raise NotImplementedError()
@@ -1,7 +1,10 @@
+import numpy as np
 import pandas as pd
 
 
-def macd(close, ema_1=12, ema_2=26, ema_3=9) -> tuple[pd.DataFrame, pd.DataFrame]:
+def macd(
+    close, ema_1=12, ema_2=26, ema_3=9
+) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     MACD   = ema_1 - ema_2
     Signal = EMA(MACD)
@@ -37,3 +40,107 @@ def rsi(close, days=14):
     relative_strength = average_gain / average_loss
     rsi = 100.0 - (100.0 / (1.0 + relative_strength))
     return rsi
+
+
+class IncrementalEMA:
+    """
+    EMA as close.ewm(span=span, adjust=False).mean(), one bar at a time.
+    Values may be numpy arrays (one value per ticker). NaN values
+    (missing candles) are handled as in pandas: the ticker keeps its
+    previous value and starts at its first non-NaN value.
+    :param span: ema period
+    """
+
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+        self.value = None
+        self.old_weight = None
+
+    def update(self, value):
+        value = np.array(value, dtype=np.float64)
+        if self.value is None:
+            self.value = np.full(value.shape, np.nan)
+            self.old_weight = np.ones(value.shape)
+        observed = ~np.isnan(value)
+        started = ~np.isnan(self.value)
+        # pandas decays the old weight on NaN bars too (ignore_na=False)
+        self.old_weight = np.where(
+            started, self.old_weight * (1 - self.alpha), self.old_weight
+        )
+        mixed = (self.old_weight * self.value + self.alpha * value) / (
+            self.old_weight + self.alpha
+        )
+        self.value = np.where(
+            observed, np.where(started, mixed, value), self.value
+        )
+        self.old_weight = np.where(observed, 1.0, self.old_weight)
+        return self.value.copy()[()]
+
+
+class IncrementalMACD:
+    """
+    Same as macd, one bar at a time.
+    :param ema_1: ema short period
+    :param ema_2: ema long period
+    :param ema_3: ema for signal line
+    """
+
+    def __init__(self, ema_1=12, ema_2=26, ema_3=9):
+        self.ema_1 = IncrementalEMA(ema_1)
+        self.ema_2 = IncrementalEMA(ema_2)
+        self.ema_3 = IncrementalEMA(ema_3)
+
+    def update(self, close):
+        """
+        :param close: new close (or array of closes)
+        :return: tuple of macd and macd_signal
+        """
+        macd = self.ema_1.update(close) - self.ema_2.update(close)
+        return macd, self.ema_3.update(macd)
+
+
+class IncrementalRSI:
+    """
+    Same as rsi, one bar at a time: NaN until days price changes are seen.
+    A NaN close (missing candle) is skipped: the ticker keeps its previous
+    value, as rsi of the series with missing candles dropped.
+    :param days: count of days back to calculate RSI
+    """
+
+    def __init__(self, days=14):
+        self.days = days
+        self.prev_close = None
+        self.gains = None
+        self.losses = None
+        self.count = None
+        self.value = None
+
+    def update(self, close):
+        close = np.array(close, dtype=np.float64)
+        shape = close.shape
+        close = close.reshape(-1)
+        if self.prev_close is None:
+            self.prev_close = np.full(close.shape, np.nan)
+            self.gains = np.zeros((self.days, close.size))
+            self.losses = np.zeros((self.days, close.size))
+            self.count = np.zeros(close.size, dtype=np.int64)
+            self.value = np.full(close.shape, np.nan)
+        observed = ~np.isnan(close)
+        changed = observed & ~np.isnan(self.prev_close)
+        tickers = np.flatnonzero(changed)
+        delta = close[tickers] - self.prev_close[tickers]
+        pos = self.count[tickers] % self.days
+        self.gains[pos, tickers] = np.maximum(delta, 0)
+        self.losses[pos, tickers] = -np.minimum(delta, 0)
+        self.count[tickers] += 1
+        self.prev_close = np.where(observed, close, self.prev_close)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative_strength = self.gains.sum(axis=0) / self.losses.sum(
+                axis=0
+            )
+        self.value = np.where(
+            changed & (self.count >= self.days),
+            100.0 - (100.0 / (1.0 + relative_strength)),
+            self.value,
+        )
+        return self.value.reshape(shape).copy()[()]
@@ -0,0 +1,194 @@
+from typing import NamedTuple, Optional
+
+import torch
+from snntorch import utils
+from torch.utils.data import DataLoader
+
+from models import NetFF, NetLSTM
+
+
+class SimulationResult(NamedTuple):
+    spk_count: torch.Tensor
+    spk_rec: Optional[torch.Tensor] = None
+    mem_rec: Optional[torch.Tensor] = None
+
+
+def simulate(net, data, num_steps, record=False) -> SimulationResult:
+    """
+    Run net for num_steps on static input data.
+    Spike counts of the output layer are accumulated in place,
+    full spike/membrane traces (num_steps, batch, outputs)
+    are kept only if record.
+    :param net: NetFF, NetLSTM or any net returning (spk, ..., mem)
+    :param data: input batch
+    :param num_steps: number of time steps
+    :param record: return spk_rec and mem_rec
+    :return: SimulationResult
+    """
+    utils.reset(net)
+    if isinstance(net, NetFF):
+        return _simulate_ff(net, data, num_steps, record)
+    if isinstance(net, NetLSTM):
+        return _simulate_lstm(net, data, num_steps, record)
+    return _simulate_generic(net, data, num_steps, record)
+
+
+class _Trace:
+    """
+    Per-step values stacked to (num_steps, ...). Without autograd they
+    are written into one preallocated tensor; with autograd they are
+    stacked once at the end, as writes into one buffer would make
+    backward copy the whole buffer on every step.
+    """
+
+    def __init__(self, num_steps: int) -> None:
+        self.num_steps = num_steps
+        self.inplace = not torch.is_grad_enabled()
+        self._steps: list[torch.Tensor] = []
+        self._buffer: Optional[torch.Tensor] = None
+
+    def add(self, step: int, value: torch.Tensor) -> None:
+        if not self.inplace:
+            self._steps.append(value)
+            return
+        if self._buffer is None:
+            self._buffer = value.new_empty((self.num_steps, *value.shape))
+        self._buffer[step] = value
+
+    def tensor(self) -> Optional[torch.Tensor]:
+        if self.inplace:
+            return self._buffer
+        return torch.stack(self._steps) if self._steps else None
+
+
+def _simulate_ff(net, data, num_steps, record):
+    # Input is static and lif1 does not depend on the second layer,
+    # so both linear layers run once over all time steps.
+    cur1 = net.lin1(data.flatten(1))
+    spk1, _ = _lif_recurrence(net.lif1, cur1.expand(num_steps, *cur1.shape))
+    cur2 = net.lin2(spk1)
+    spk_count = cur2.new_zeros(cur2.shape[1:])
+    spk_rec, mem_rec = _lif_recurrence(
+        net.lif2, cur2, spk_count, record_spk=record, record_mem=record
+    )
+    return SimulationResult(spk_count, spk_rec, mem_rec)
+
+
+def _lif_recurrence(lif, cur, spk_count=None, **kwargs):
+    return leaky_recurrence(
+        cur,
+        lif.beta,
+        lif.threshold,
+        lif.reset_mechanism,
+        lif.spike_grad,
+        spk_count,
+        **kwargs,
+    )
+
+
+def leaky_recurrence(
+    cur,
+    beta,
+    threshold,
+    reset_mechanism,
+    spike_grad,
+    spk_count=None,
+    record_spk=True,
+    record_mem=False,
+) -> tuple[Optional[torch.Tensor], Optional[torch.Tensor]]:
+    """
+    Same update as snn.Leaky over the first (time) dimension of cur,
+    without per-call module overhead.
+    :param cur: input current of shape (num_steps, ...)
+    :param beta: tensor broadcastable to cur[0]
+    :param threshold: tensor broadcastable to cur[0]
+    :param spk_count: if given, spikes are added to it in place
+    :return: spk_rec and mem_rec (None if not recorded)
+    """
+    beta = beta.clamp(0, 1)
+    spk_trace = _Trace(cur.size(0)) if record_spk else None
+    mem_trace = _Trace(cur.size(0)) if record_mem else None
+    mem = torch.zeros_like(cur[0])
+    # unbind: indexing cur[step] would make backward allocate
+    # a full-size gradient for every step
+    for step, cur_step in enumerate(cur.unbind(0)):
+        reset = spike_grad(mem - threshold).detach()
+        if reset_mechanism == 'zero':
+            mem = (1 - reset) * mem
+        mem = beta * mem + cur_step
+        if reset_mechanism == 'subtract':
+            mem = mem - reset * threshold
+        spk = spike_grad(mem - threshold)
+        if spk_count is not None:
+            spk_count.add_(spk)
+        if spk_trace is not None:
+            spk_trace.add(step, spk)
+        if mem_trace is not None:
+            mem_trace.add(step, mem)
+    return (
+        spk_trace.tensor() if spk_trace is not None else None,
+        mem_trace.tensor() if mem_trace is not None else None,
+    )
+
+
+def _simulate_lstm(net, data, num_steps, record):
+    # NetLSTM.forward starts from init_slstm() on every call,
+    # so every step gives the same output.
+    res = net(data)
+    spk, mem = res[0], res[-1]
+    if not record:
+        return SimulationResult(spk * num_steps)
+    return SimulationResult(
+        spk * num_steps,
+        spk.expand(num_steps, *spk.shape),
+        mem.expand(num_steps, *mem.shape),
+    )
+
+
+def _simulate_generic(net, data, num_steps, record):
+    spk_count = None
+    spk_trace = _Trace(num_steps)
+    mem_trace = _Trace(num_steps)
+    for step in range(num_steps):
+        res = net(data)
+        spk, mem = res[0], res[-1]
+        if spk_count is None:
+            spk_count = torch.zeros_like(spk)
+        spk_count.add_(spk)
+        if record:
+            spk_trace.add(step, spk)
+            mem_trace.add(step, mem)
+    return SimulationResult(spk_count, spk_trace.tensor(), mem_trace.tensor())
+
+
+def whole_dataset(loader) -> tuple[torch.Tensor, torch.Tensor]:
+    dataset = getattr(loader, 'dataset', loader)
+    if hasattr(dataset, 'tensors'):
+        tensors = dataset.tensors()
+        return tensors[0], tensors[-1]
+    if dataset is loader:  # a dataset without batches
+        loader = DataLoader(dataset, batch_size=len(dataset))
+    batches = list(loader)
+    data = torch.cat([torch.as_tensor(batch[0]) for batch in batches])
+    targets = torch.cat([torch.as_tensor(batch[-1]) for batch in batches])
+    return data, targets
+
+
+def spike_accuracy(net, loader, num_steps, device=None) -> float:
+    """
+    Rate-coded accuracy of net on the whole dataset of loader,
+    simulated as one batch.
+    :param net: spiking net
+    :param loader: WindowBatchLoader/DataLoader or dataset with tensors()
+    :param num_steps: number of time steps
+    :param device: device to run on
+    :return: accuracy
+    """
+    data, targets = whole_dataset(loader)
+    if device is not None:
+        data = data.to(device)
+        targets = targets.to(device)
+    with torch.no_grad():
+        net.eval()
+        spk_count = simulate(net, data, num_steps).spk_count
+    return (spk_count.argmax(dim=1) == targets).float().mean().item()
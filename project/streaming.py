@@ -0,0 +1,238 @@
+import copy
+import time
+import warnings
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+
+from models import NetFF, model_getter
+from signals import IncrementalMACD
+from simulation import simulate
+from training import load_checkpoint
+
+RESET_MECHANISMS = {'subtract': 0, 'zero': 1, 'none': 2}
+
+
+class _NetFFInference(nn.Module):
+    """
+    NetFF forward for inference only: heaviside spikes instead of
+    the surrogate autograd function, so the loop can be scripted.
+    """
+
+    def __init__(self, net: NetFF, num_steps: int) -> None:
+        super().__init__()
+        self.lin1 = net.lin1
+        self.lin2 = net.lin2
+        self.num_steps = num_steps
+        self.reset_mechanism = RESET_MECHANISMS[net.lif1.reset_mechanism]
+        for layer in ('lif1', 'lif2'):
+            lif = getattr(net, layer)
+            self.register_buffer(
+                f'{layer}_beta', lif.beta.detach().clamp(0, 1).float()
+            )
+            self.register_buffer(
+                f'{layer}_threshold', lif.threshold.detach().float()
+            )
+
+    def _lif(
+        self,
+        cur: torch.Tensor,
+        mem: torch.Tensor,
+        beta: torch.Tensor,
+        threshold: torch.Tensor,
+    ) -> tuple[torch.Tensor, torch.Tensor]:
+        reset = (mem > threshold).to(mem.dtype)
+        if self.reset_mechanism == 1:
+            mem = (1 - reset) * mem
+        mem = beta * mem + cur
+        if self.reset_mechanism == 0:
+            mem = mem - reset * threshold
+        return (mem > threshold).to(mem.dtype), mem
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        cur1 = self.lin1(x)
+        mem1 = torch.zeros_like(cur1)
+        mem2 = cur1.new_zeros((x.size(0), self.lin2.out_features))
+        spk_count = torch.zeros_like(mem2)
+        for _ in range(self.num_steps):
+            spk1, mem1 = self._lif(
+                cur1, mem1, self.lif1_beta, self.lif1_threshold
+            )
+            spk2, mem2 = self._lif(
+                self.lin2(spk1), mem2, self.lif2_beta, self.lif2_threshold
+            )
+            spk_count = spk_count + spk2
+        return spk_count
+
+
+class _SpikeCount(nn.Module):
+    def __init__(self, net: nn.Module, num_steps: int) -> None:
+        super().__init__()
+        self.net = net
+        self.num_steps = num_steps
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return simulate(self.net, x, self.num_steps).spk_count
+
+
+def compile_net(net: nn.Module, num_inputs: int, num_steps: int):
+    """
+    Inference-only compiled net: input (batch, num_inputs) -> output
+    spike counts (batch, outputs) after num_steps from rest.
+    NetFF is scripted, other nets (NetLSTM) are traced through simulate.
+    The compiled net runs on CPU, net itself is left on its device.
+    """
+    net = copy.deepcopy(net).cpu().eval()
+    with torch.no_grad():
+        if isinstance(net, NetFF):
+            return torch.jit.freeze(
+                torch.jit.script(_NetFFInference(net, num_steps).eval())
+            )
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', torch.jit.TracerWarning)
+            return torch.jit.trace(
+                _SpikeCount(net, num_steps).eval(),
+                torch.zeros(1, num_inputs),
+                check_trace=False,
+            )
+
+
+def load_net(path: Path, model_type: str = 'NetFF', **kwargs) -> nn.Module:
+    """
+    Net from a training checkpoint (see training.fit) or a state_dict.
+    :param kwargs: model_getter arguments the net was created with
+    """
+    net = model_getter(model_type, **kwargs)
+    state = load_checkpoint(path)
+    if state is None:
+        raise FileNotFoundError(path)
+    net.load_state_dict(state.get('net', state))
+    return net.cpu().eval()
+
+
+class MACDHistFeatures:
+    """macd - macd_signal of every ticker, updated one bar at a time."""
+
+    num_features = 1
+
+    def __init__(self) -> None:
+        self.macd = IncrementalMACD()
+
+    def update(self, close: np.ndarray) -> np.ndarray:
+        macd, macd_signal = self.macd.update(close)
+        return (macd - macd_signal)[:, None]
+
+
+class StreamingPredictor:
+    """
+    Direction predictions for many tickers on every new candle.
+    Between candles it keeps the state of incremental features and
+    a ring buffer with the last window feature rows of every ticker,
+    so a candle costs one feature update and one call of the compiled
+    net for all tickers.
+    Membrane state is not carried between candles: the nets are trained
+    on windows simulated from rest, and the compiled net does the same.
+    :param model: compiled net (see compile_net)
+    :param tickers: tickers, closes are passed in this order
+    :param window: window length the net was trained on
+    :param features: incremental features, MACDHistFeatures by default
+    """
+
+    def __init__(self, model, tickers: list[str], window: int, features=None):
+        self.model = model
+        self.tickers = list(tickers)
+        self.window = window
+        self.features = features or MACDHistFeatures()
+        self._buffer = torch.zeros(
+            len(self.tickers), window, self.features.num_features
+        )
+        self._pos = 0
+        self._seen = 0
+        self._steps = torch.arange(window)
+
+    def update(self, close) -> Optional[np.ndarray]:
+        """
+        :param close: close of the new candle for every ticker,
+            NaN for a ticker without a candle on this step
+        :return: predicted direction for every ticker (1 up, 0 down),
+            None until window candles are seen
+        """
+        close = np.asarray(close, dtype=np.float64)
+        self._buffer[:, self._pos] = torch.from_numpy(
+            self.features.update(close).astype(np.float32)
+        )
+        self._pos = (self._pos + 1) % self.window
+        self._seen += 1
+        if self._seen < self.window:
+            return None
+        order = (self._steps + self._pos) % self.window  # oldest first
+        x = self._buffer[:, order].reshape(len(self.tickers), -1)
+        with torch.no_grad():
+            spk_count = self.model(x)
+        return spk_count.argmax(dim=1).numpy()
+
+    def replay(
+        self, closes: pd.DataFrame
+    ) -> Iterator[tuple[pd.Timestamp, Optional[np.ndarray]]]:
+        """
+        Feed candles one by one.
+        :param closes: close prices, a column per ticker, a row per candle
+        """
+        values = closes[self.tickers].to_numpy(dtype=np.float64)
+        for index, close in zip(closes.index, values):
+            yield index, self.update(close)
+
+
+def benchmark(
+    model_type: str = 'NetFF',
+    num_tickers: int = 100,
+    window: int = 10,
+    num_steps: int = 50,
+    num_candles: int = 500,
+) -> dict[str, float]:
+    """
+    Latency of StreamingPredictor.update for num_tickers tickers
+    and of the eager reset-and-simulate path for the same windows.
+    :return: p50 and p99 latency in milliseconds
+    """
+    net = model_getter(model_type, num_inputs=window, num_hidden=16).cpu()
+    tickers = [f'T{idx}' for idx in range(num_tickers)]
+    closes = pd.DataFrame(
+        100 + np.random.randn(num_candles, num_tickers).cumsum(axis=0),
+        columns=tickers,
+    )
+    predictor = StreamingPredictor(
+        compile_net(net, window, num_steps), tickers, window
+    )
+
+    x = torch.randn(num_tickers, window)
+    stream_times = []
+    eager_times = []
+    for close in closes.to_numpy():
+        start = time.perf_counter()
+        predictions = predictor.update(close)
+        stream_times.append(time.perf_counter() - start)
+        if predictions is None:
+            continue
+        start = time.perf_counter()
+        with torch.no_grad():
+            simulate(net, x, num_steps)
+        eager_times.append(time.perf_counter() - start)
+
+    stream_ms = 1e3 * np.array(stream_times[window:])
+    eager_ms = 1e3 * np.array(eager_times)
+    return {
+        'stream_p50': float(np.percentile(stream_ms, 50)),
+        'stream_p99': float(np.percentile(stream_ms, 99)),
+        'eager_p50': float(np.percentile(eager_ms, 50)),
+        'eager_p99': float(np.percentile(eager_ms, 99)),
+    }
+
+
+if __name__ == '__main__':
+    for model_type in ('NetFF', 'NetLSTM'):
+        print(model_type, benchmark(model_type))
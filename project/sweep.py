@@ -0,0 +1,397 @@
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import statistics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from itertools import product
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import pandas as pd
+import torch
+from snntorch import surrogate
+
+from models import model_getter
+from training import CHECKPOINT_NAME, fit, load_checkpoint
+from window_dataset import WindowBatchLoader
+
+logger = logging.getLogger(__name__)
+
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_PRUNED = 'pruned'
+FINISHED_STATUSES = (STATUS_DONE, STATUS_PRUNED)
+
+
+def config_name(config: dict[str, Any]) -> str:
+    return '-'.join(f'{key}={value}' for key, value in config.items())
+
+
+def make_grid(*parameters_products: dict[str, Iterable]) -> list[dict]:
+    """
+    All configs of the product of parameter dicts.
+    beta is dropped for NetLSTM (it has no beta), so configs
+    that differ only in beta are not repeated.
+    :return: list of config dicts
+    """
+    parameters: dict[str, Iterable] = {}
+    for parameters_product in parameters_products:
+        parameters.update(parameters_product)
+    configs = []
+    names = set()
+    for values in product(*parameters.values()):
+        config = dict(zip(parameters.keys(), values))
+        for key, value in config.items():
+            if hasattr(value, 'item'):  # numpy scalars
+                config[key] = value.item()
+        if config.get('model_name') == 'NetLSTM' and 'beta' in config:
+            config['beta'] = None
+        name = config_name(config)
+        if name not in names:
+            names.add(name)
+            configs.append(config)
+    return configs
+
+
+class SweepStorage:
+    """
+    Sweep results in one sqlite file, safe to share between processes.
+    results: one row per config (params as json, status, histories),
+    epochs: one row per finished epoch, used by pruners.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'name TEXT PRIMARY KEY, params TEXT, status TEXT, '
+                'epochs INTEGER, best_test_acc REAL, final_test_acc REAL, '
+                'train_acc_hist TEXT, test_acc_hist TEXT, loss_hist TEXT)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS epochs ('
+                'name TEXT, epoch INTEGER, train_acc REAL, test_acc REAL, '
+                'loss REAL, PRIMARY KEY (name, epoch))'
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=60)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def finished(self) -> set[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT name FROM results WHERE status IN (?, ?)',
+                FINISHED_STATUSES,
+            ).fetchall()
+        return {name for name, in rows}
+
+    def start(
+        self, name: str, config: dict[str, Any], from_epoch: int = 0
+    ) -> None:
+        """
+        Mark config as running and drop its epochs from from_epoch on,
+        left by an earlier run that got further than the resumed one.
+        :param from_epoch: epochs restored from a checkpoint
+        """
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO results (name, params, status) '
+                'VALUES (?, ?, ?)',
+                (name, json.dumps(config), STATUS_RUNNING),
+            )
+            conn.execute(
+                'DELETE FROM epochs WHERE name = ? AND epoch >= ?',
+                (name, from_epoch),
+            )
+
+    def add_epoch(
+        self,
+        name: str,
+        epoch: int,
+        train_acc: float,
+        test_acc: float,
+        loss: float,
+    ) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO epochs VALUES (?, ?, ?, ?, ?)',
+                (name, epoch, train_acc, test_acc, loss),
+            )
+
+    def finish(
+        self,
+        name: str,
+        status: str,
+        train_acc_hist: list[float],
+        test_acc_hist: list[float],
+        loss_hist: list[float],
+    ) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE results SET status = ?, epochs = ?, '
+                'best_test_acc = ?, final_test_acc = ?, '
+                'train_acc_hist = ?, test_acc_hist = ?, loss_hist = ? '
+                'WHERE name = ?',
+                (
+                    status,
+                    len(test_acc_hist),
+                    max(test_acc_hist, default=None),
+                    test_acc_hist[-1] if test_acc_hist else None,
+                    json.dumps(train_acc_hist),
+                    json.dumps(test_acc_hist),
+                    json.dumps(loss_hist),
+                    name,
+                ),
+            )
+
+    def test_acc_at(self, epoch: int, exclude: str = '') -> list[float]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT test_acc FROM epochs WHERE epoch = ? AND name != ?',
+                (epoch, exclude),
+            ).fetchall()
+        return [value for value, in rows]
+
+    def mean_test_acc_until(
+        self, epoch: int, exclude: str = ''
+    ) -> list[float]:
+        """Running mean test acc up to epoch of configs that reached it."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT AVG(test_acc) FROM epochs '
+                'WHERE epoch <= ? AND name != ? GROUP BY name '
+                'HAVING MAX(epoch) >= ?',
+                (epoch, exclude, epoch),
+            ).fetchall()
+        return [value for value, in rows]
+
+    def to_frame(self) -> pd.DataFrame:
+        with self._connect() as conn:
+            results = pd.read_sql('SELECT * FROM results', conn)
+        params = pd.DataFrame(
+            [json.loads(value) for value in results.params],
+            index=results.index,
+        )
+        return pd.concat([params, results.drop(columns='params')], axis=1)
+
+
+class MedianStopPruner:
+    """
+    Stop a config when its best test acc is below the median
+    of running mean test acc of other configs at the same epoch.
+    :param min_epochs: never prune before this many epochs
+    :param min_trials: need at least this many other configs
+    """
+
+    def __init__(self, min_epochs: int = 5, min_trials: int = 5) -> None:
+        self.min_epochs = min_epochs
+        self.min_trials = min_trials
+
+    def should_prune(
+        self,
+        storage: SweepStorage,
+        name: str,
+        epoch: int,
+        test_acc_hist: list[float],
+    ) -> bool:
+        if epoch + 1 < self.min_epochs:
+            return False
+        others = storage.mean_test_acc_until(epoch, exclude=name)
+        if len(others) < self.min_trials:
+            return False
+        return max(test_acc_hist) < statistics.median(others)
+
+
+class SuccessiveHalvingPruner:
+    """
+    Asynchronous successive halving: rungs at min_epochs * eta ** k epochs,
+    at a rung a config goes on only if its test acc is in the top 1 / eta
+    of configs that reached the rung.
+    :param min_epochs: epochs of the first rung
+    :param eta: reduction factor
+    """
+
+    def __init__(self, min_epochs: int = 5, eta: int = 3) -> None:
+        self.min_epochs = min_epochs
+        self.eta = eta
+
+    def _is_rung(self, epochs: int) -> bool:
+        rung = self.min_epochs
+        while rung < epochs:
+            rung *= self.eta
+        return rung == epochs
+
+    def should_prune(
+        self,
+        storage: SweepStorage,
+        name: str,
+        epoch: int,
+        test_acc_hist: list[float],
+    ) -> bool:
+        if not self._is_rung(epoch + 1):
+            return False
+        values = storage.test_acc_at(epoch, exclude=name)
+        values.append(test_acc_hist[-1])
+        if len(values) < self.eta:
+            return False
+        keep = max(len(values) // self.eta, 1)
+        cutoff = sorted(values, reverse=True)[keep - 1]
+        return test_acc_hist[-1] < cutoff
+
+
+def build_model(config: dict[str, Any], num_inputs: int):
+    return model_getter(
+        config['model_name'],
+        num_inputs=num_inputs,
+        num_hidden=config['num_hidden'],
+        beta=config.get('beta'),
+        threshold=config['threshold'],
+        learn_threshold=config['learn_threshold'],
+        reset_mechanism=config['reset_mechanism'],
+        spike_grad=surrogate.fast_sigmoid(config['spike_grad_rate']),
+    )
+
+
+_WORKER: dict[str, Any] = {}
+
+
+def _init_worker(num_threads: int, worker_data: dict[str, Any]) -> None:
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:  # already set in this process
+        pass
+    _WORKER.update(worker_data)
+
+
+def _run_config(config: dict[str, Any]) -> tuple[str, str, float]:
+    storage: SweepStorage = _WORKER['storage']
+    pruner = _WORKER['pruner']
+    train_dataset = _WORKER['train_dataset']
+    test_dataset = _WORKER['test_dataset']
+    name = config_name(config)
+
+    torch.manual_seed(_WORKER['seed'])
+    device = torch.device('cpu')
+    net = build_model(config, num_inputs=train_dataset.features.size(1))
+    net = net.to(device)
+    train_loader = WindowBatchLoader(
+        train_dataset,
+        batch_size=_WORKER['batch_size'],
+        shuffle=False,
+        drop_last=True,
+    )
+    num_epochs = _WORKER['num_epochs']
+    checkpoint_dir = None
+    resumed_epochs = 0
+    if _WORKER['checkpoints_dir'] is not None:
+        checkpoint_dir = _WORKER['checkpoints_dir'] / name
+        checkpoint = load_checkpoint(checkpoint_dir / CHECKPOINT_NAME)
+        if checkpoint is not None:
+            resumed_epochs = len(checkpoint['loss_hist'])
+    storage.start(name, config, from_epoch=resumed_epochs)
+
+    def callback(epoch, train_acc_hist, test_acc_hist, loss_hist):
+        storage.add_epoch(
+            name, epoch, train_acc_hist[-1], test_acc_hist[-1], loss_hist[-1]
+        )
+        if pruner is None or epoch + 1 >= num_epochs:
+            return False
+        return pruner.should_prune(storage, name, epoch, test_acc_hist)
+
+    train_acc_hist, test_acc_hist, loss_hist = fit(
+        net,
+        train_loader,
+        test_dataset,
+        num_steps=config.get('num_steps', 50),
+        num_epochs=num_epochs,
+        device=device,
+        callback=callback,
+        checkpoint_dir=checkpoint_dir,
+    )
+    status = STATUS_DONE if len(loss_hist) >= num_epochs else STATUS_PRUNED
+    storage.finish(name, status, train_acc_hist, test_acc_hist, loss_hist)
+    return name, status, test_acc_hist[-1]
+
+
+def run_sweep(
+    configs: list[dict[str, Any]],
+    train_dataset,
+    test_dataset,
+    storage_path: Path,
+    num_epochs: int = 300,
+    batch_size: int = 128,
+    max_workers: Optional[int] = None,
+    threads_per_worker: int = 1,
+    pruner=None,
+    seed: int = 0,
+    checkpoints_dir: Optional[Path] = None,
+) -> SweepStorage:
+    """
+    Train all configs on a process pool, results go to storage_path.
+    Configs already done or pruned in storage are skipped,
+    so an interrupted sweep resumes by calling it again.
+    :param configs: configs from make_grid
+    :param train_dataset: WindowStockDataset
+    :param test_dataset: WindowStockDataset
+    :param storage_path: sqlite file for SweepStorage
+    :param max_workers: processes, cpu_count // threads_per_worker by default
+    :param threads_per_worker: torch threads in every worker
+    :param pruner: MedianStopPruner, SuccessiveHalvingPruner or None
+    :param checkpoints_dir: if given, every config is checkpointed
+        in its own subdirectory, so killed workers resume mid-training
+    :return: SweepStorage
+    """
+    storage = SweepStorage(storage_path)
+    finished = storage.finished()
+    todo = [
+        config for config in configs if config_name(config) not in finished
+    ]
+    logger.info(
+        'Sweep: %s configs, %s already finished, %s to run',
+        len(configs),
+        len(configs) - len(todo),
+        len(todo),
+    )
+    if not todo:
+        return storage
+
+    if max_workers is None:
+        max_workers = max((os.cpu_count() or 1) // threads_per_worker, 1)
+
+    worker_data = {
+        'storage': storage,
+        'pruner': pruner,
+        'train_dataset': train_dataset,
+        'test_dataset': test_dataset,
+        'num_epochs': num_epochs,
+        'batch_size': batch_size,
+        'seed': seed,
+        'checkpoints_dir': checkpoints_dir,
+    }
+    best_test_acc = 0.0
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(threads_per_worker, worker_data),
+    ) as executor:
+        futures = [executor.submit(_run_config, config) for config in todo]
+        for future in as_completed(futures):
+            name, status, test_acc = future.result()
+            logger.info('Finished (%s, acc %s): %s', status, test_acc, name)
+            if status == STATUS_DONE and test_acc > best_test_acc:
+                best_test_acc = test_acc
+                logger.warning('NEW BEST (acc %s): %s', best_test_acc, name)
+    return storage
@@ -0,0 +1,187 @@
+import logging
+import os
+import random
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+import torch
+from snntorch import functional as SF
+
+from simulation import simulate, spike_accuracy
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'last.pt'
+
+
+def train_epoch(
+    net, loader, optimizer, loss_fn, num_steps, device=None
+) -> float:
+    """
+    One epoch of BPTT over loader with time-static input.
+    :return: average loss over batches
+    """
+    net.train()
+    total_loss = 0.0
+    batches = 0
+    for data, targets in loader:
+        if device is not None:
+            data = data.to(device)
+            targets = targets.to(device)
+        spk_rec = simulate(net, data, num_steps, record=True).spk_rec
+        loss = loss_fn(spk_rec, targets)
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        total_loss += loss.item()
+        batches += 1
+    return total_loss / max(batches, 1)
+
+
+def _rng_state() -> dict[str, Any]:
+    state = {
+        'torch': torch.get_rng_state(),
+        'numpy': np.random.get_state(),
+        'random': random.getstate(),
+    }
+    if torch.cuda.is_available():
+        state['cuda'] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def _set_rng_state(state: dict[str, Any]) -> None:
+    torch.set_rng_state(state['torch'])
+    np.random.set_state(state['numpy'])
+    random.setstate(state['random'])
+    if 'cuda' in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+
+
+def save_checkpoint(path: Path, state: dict[str, Any]) -> None:
+    """Write to a temporary file and rename, so path is never partial."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: Path) -> Optional[dict[str, Any]]:
+    if not path.exists():
+        return None
+    return torch.load(path, map_location='cpu', weights_only=False)
+
+
+def fit(
+    net,
+    train_loader,
+    test_loader,
+    num_steps: int = 50,
+    num_epochs: int = 25,
+    lr: float = 1e-2,
+    device=None,
+    callback: Optional[
+        Callable[[int, list[float], list[float], list[float]], bool]
+    ] = None,
+    checkpoint_dir: Optional[Path] = None,
+    checkpoint_every: int = 10,
+    patience: Optional[int] = None,
+) -> tuple[list[float], list[float], list[float]]:
+    """
+    Train net with Adam and ce_rate_loss, evaluating train and test
+    accuracy on the whole datasets after every epoch.
+    :param callback: callback(epoch, train_acc_hist, test_acc_hist,
+        loss_hist), training stops if it returns True
+    :param checkpoint_dir: if given, net, Adam state, RNG state and
+        histories are saved there every checkpoint_every epochs and
+        training resumes from the saved checkpoint
+    :param checkpoint_every: epochs between checkpoints
+    :param patience: stop if test acc has not improved for this many
+        epochs, weights of the best epoch are loaded at the end
+    :return: train_acc_hist, test_acc_hist, loss_hist
+    """
+    optimizer = torch.optim.Adam(net.parameters(), lr=lr, betas=(0.9, 0.999))
+    loss_fn = SF.ce_rate_loss()
+    train_acc_hist: list[float] = []
+    test_acc_hist: list[float] = []
+    loss_hist: list[float] = []
+    best_net: Optional[dict[str, torch.Tensor]] = None
+    stopped = False
+
+    checkpoint_path = None
+    if checkpoint_dir is not None:
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint_path = checkpoint_dir / CHECKPOINT_NAME
+        checkpoint = load_checkpoint(checkpoint_path)
+        if checkpoint is not None:
+            net.load_state_dict(checkpoint['net'])
+            optimizer.load_state_dict(checkpoint['optimizer'])
+            _set_rng_state(checkpoint['rng'])
+            train_acc_hist = checkpoint['train_acc_hist']
+            test_acc_hist = checkpoint['test_acc_hist']
+            loss_hist = checkpoint['loss_hist']
+            best_net = checkpoint['best_net']
+            stopped = checkpoint['stopped']
+            logger.info(
+                'Resumed from %s after epoch %s',
+                checkpoint_path,
+                len(loss_hist),
+            )
+
+    for epoch in range(len(loss_hist), num_epochs):
+        if stopped:
+            break
+        loss = train_epoch(
+            net, train_loader, optimizer, loss_fn, num_steps, device
+        )
+        loss_hist.append(loss)
+        train_acc_hist.append(
+            spike_accuracy(net, train_loader, num_steps, device)
+        )
+        test_acc_hist.append(
+            spike_accuracy(net, test_loader, num_steps, device)
+        )
+
+        best_epoch = test_acc_hist.index(max(test_acc_hist))
+        if patience is not None:
+            if best_epoch == epoch:
+                best_net = {
+                    key: value.detach().clone()
+                    for key, value in net.state_dict().items()
+                }
+            if epoch - best_epoch >= patience:
+                logger.info(
+                    'Early stopping after epoch %s, best epoch %s',
+                    epoch + 1,
+                    best_epoch + 1,
+                )
+                stopped = True
+
+        if callback is not None and callback(
+            epoch, train_acc_hist, test_acc_hist, loss_hist
+        ):
+            logger.info('Stopped after epoch %s', epoch + 1)
+            stopped = True
+
+        if checkpoint_path is not None and (
+            stopped
+            or (epoch + 1) % checkpoint_every == 0
+            or epoch + 1 == num_epochs
+        ):
+            save_checkpoint(
+                checkpoint_path,
+                {
+                    'net': net.state_dict(),
+                    'optimizer': optimizer.state_dict(),
+                    'rng': _rng_state(),
+                    'train_acc_hist': train_acc_hist,
+                    'test_acc_hist': test_acc_hist,
+                    'loss_hist': loss_hist,
+                    'best_net': best_net,
+                    'stopped': stopped,
+                },
+            )
+
+    if best_net is not None:
+        net.load_state_dict(best_net)
+
+    return train_acc_hist, test_acc_hist, loss_hist
@@ -0,0 +1,101 @@
+from typing import Iterator, Optional, Union
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+
+class WindowStockDataset(Dataset):
+    """
+    Sliding windows over price features, built once as strided views
+    over one contiguous float32 tensor.
+    Sample i is (features of rows i..i+window-1 flattened row by row,
+    [close window,] int(close[i+window] > close[i+window-1])).
+    :param data: features, DataFrame/array of shape (n,) or (n, features)
+    :param close_data: close prices of shape (n,)
+    :param window: window length
+    :param return_close: also return the close window for each sample
+    """
+
+    def __init__(self, data, close_data, window, return_close=False):
+        values = np.asarray(data, dtype=np.float32)
+        self.data = torch.from_numpy(values.reshape(len(values), -1).copy())
+        self.close_data = torch.from_numpy(
+            np.asarray(close_data, dtype=np.float32).reshape(-1).copy()
+        )
+        self.window = window
+        self.return_close = return_close
+
+        length = max(len(self.data) - window, 0)
+        num_features = self.data.size(1)
+        self.features = self.data.as_strided(
+            (length, window * num_features), (num_features, 1)
+        )
+        self.close = self.close_data.as_strided((length, window), (1, 1))
+        self.targets = (
+            self.close_data[window : window + length]
+            > self.close_data[window - 1 : window - 1 + length]
+        ).long()
+
+    def get_batch(
+        self, index: Union[slice, torch.Tensor]
+    ) -> tuple[torch.Tensor, ...]:
+        if self.return_close:
+            return (
+                self.features[index],
+                self.close[index],
+                self.targets[index],
+            )
+        return self.features[index], self.targets[index]
+
+    def tensors(self) -> tuple[torch.Tensor, ...]:
+        return self.get_batch(slice(None))
+
+    def __getitem__(self, index):
+        return self.get_batch(index)
+
+    def __len__(self):
+        return self.targets.size(0)
+
+
+class WindowBatchLoader:
+    """
+    Batch iterator over WindowStockDataset, returns whole batches
+    by slicing (or by one gather with a permutation if shuffle).
+    :param dataset: WindowStockDataset
+    :param batch_size: batch size
+    :param shuffle: shuffle samples every epoch
+    :param drop_last: drop last incomplete batch
+    :param generator: torch.Generator for shuffle
+    """
+
+    def __init__(
+        self,
+        dataset: WindowStockDataset,
+        batch_size: int = 1,
+        shuffle: bool = False,
+        drop_last: bool = False,
+        generator: Optional[torch.Generator] = None,
+    ) -> None:
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.generator = generator
+
+    def __iter__(self) -> Iterator[tuple[torch.Tensor, ...]]:
+        length = len(self.dataset)
+        end = len(self) * self.batch_size if self.drop_last else length
+        order = None
+        if self.shuffle:
+            order = torch.randperm(length, generator=self.generator)
+        for start in range(0, end, self.batch_size):
+            index = slice(start, min(start + self.batch_size, end))
+            if order is not None:
+                index = order[index]
+            yield self.dataset.get_batch(index)
+
+    def __len__(self) -> int:
+        if self.drop_last:
+            return len(self.dataset) // self.batch_size
+        return -(-len(self.dataset) // self.batch_size)